@@ -2,8 +2,6 @@ from abc import ABC
 from typing import Any, Dict, Optional
 from urllib import parse as urlparse
 
-import requests
-
 
 class HTTPAPI(ABC):
     def __init__(self, url: str, cache: Optional[Dict[str, Any]] = None) -> None:
@@ -19,6 +17,9 @@ class HTTPAPI(ABC):
         if use_cache and cache_key in self.cache:
             return self.cache[cache_key]
 
+        # Deferred as requests is slow to import and most commands never make a request
+        import requests
+
         res = requests.get(url=self.uri(endpoint), headers=self.headers, params=kwargs)
         res.raise_for_status()
         res_json = res.json()
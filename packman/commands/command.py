@@ -3,8 +3,8 @@ from argparse import ArgumentParser
 from math import ceil
 from typing import Any, Iterable, Optional
 
-from loguru import logger
 from packman.manager import Packman
+from packman.utils.logger import logger
 from packman.utils.output import ConsoleOutput
 
 
@@ -1,44 +1,41 @@
-import json
 import os
 from argparse import ArgumentParser
+from pathlib import Path
 from typing import Optional, Set
-from zipfile import ZipFile
 
-from loguru import logger
 from packman.models.manifest import Manifest
+from packman.utils.logger import logger
 from packman.utils.progress import StepProgress
+from packman.utils.serialization import dump_json, load_json
 
 from .command import Command
 from .util import get_version_name
 
 _DEFAULT_EXPORT_FILE = "packman-export"
 _DEFAULT_EXPORT_FORMAT = "json"
+_EXPORT_FORMATS = {".json": "json", ".zip": "zip"}
+_EXPORT_EXTENSIONS = {format: ext for ext, format in _EXPORT_FORMATS.items()}
+_DEFAULT_COMPRESS_LEVEL = 1
 
 
 def _default_export_path(format: Optional[str] = None) -> str:
     if format is None:
         format = _DEFAULT_EXPORT_FORMAT
 
-    if format == "json":
-        return f"{_DEFAULT_EXPORT_FILE}.json"
-    if format == "zip":
-        return f"{_DEFAULT_EXPORT_FILE}.zip"
-
-    raise ValueError(f"unknown format: {format}")
+    try:
+        return f"{_DEFAULT_EXPORT_FILE}{_EXPORT_EXTENSIONS[format]}"
+    except KeyError:
+        raise ValueError(f"unknown format: {format}") from None
 
 
 def _infer_export_format(path: str) -> str:
-    name = os.path.basename(path)
-    ext_idx = name.rfind(os.path.extsep)
-    if ext_idx <= 0:
+    _, ext = os.path.splitext(path)
+    if not ext:
         return _DEFAULT_EXPORT_FORMAT
-    ext = name[ext_idx:]
-    if ext == ".json":
-        return "json"
-    if ext == ".zip":
-        return "zip"
-
-    raise ValueError(f"unrecognised extension: {path}")
+    try:
+        return _EXPORT_FORMATS[ext]
+    except KeyError:
+        raise ValueError(f"unrecognised extension: {path}") from None
 
 
 class ExportCommand(Command):
@@ -49,9 +46,21 @@ class ExportCommand(Command):
             "-o", "--output", help="The file to export", dest="output_path"
         )
         parser.add_argument("--format", help="The format to use", dest="format")
+        parser.add_argument(
+            "--compress-level",
+            help="The compression level to use for zip exports, from 0 (fastest) to 9 (smallest)",
+            dest="compress_level",
+            type=int,
+            choices=range(10),
+            default=_DEFAULT_COMPRESS_LEVEL,
+            metavar="<level>",
+        )
 
     def execute(
-        self, output_path: Optional[str] = None, format: Optional[str] = None
+        self,
+        output_path: Optional[str] = None,
+        format: Optional[str] = None,
+        compress_level: int = _DEFAULT_COMPRESS_LEVEL,
     ) -> None:
         if not output_path:
             output_path = _default_export_path(format=format)
@@ -73,12 +82,19 @@ class ExportCommand(Command):
                     for package_name, package in manifest.packages.items()
                 }
 
-                with open(output_path, "w") as fp:
-                    json.dump(versions, fp)
+                with open(output_path, "wb") as fp:
+                    fp.write(dump_json(versions))
 
             elif format == "zip":
+                from zipfile import ZIP_DEFLATED, ZipFile
+
                 root = self.packman.root_dir
-                with ZipFile(output_path, "w") as zipfile:
+                with ZipFile(
+                    output_path,
+                    "w",
+                    compression=ZIP_DEFLATED,
+                    compresslevel=compress_level,
+                ) as zipfile:
                     on_step_progress = StepProgress.from_step_count(
                         step_count=sum(
                             len(package.files) for package in manifest.packages.values()
@@ -91,6 +107,7 @@ class ExportCommand(Command):
                         for file in package.files:
                             if file not in files_seen:
                                 relfile = os.path.relpath(file, root)
+                                # Compressed at the level given to the archive
                                 zipfile.write(file, relfile)
                                 files_seen.add(file)
                             on_step_progress.advance()
@@ -98,7 +115,7 @@ class ExportCommand(Command):
                     zip_manifest.original_files = {}
                     zip_manifest.orphaned_files = set()
                     zip_manifest.update_path_root(".")
-                    zipfile.writestr("manifest.json", zip_manifest.json(indent=2))
+                    zipfile.writestr("manifest.json", dump_json(zip_manifest.dict()))
                     on_step_progress.advance()
 
             else:
@@ -137,24 +154,23 @@ class ImportCommand(Command):
             self.output.write_step_progress(step_name, p)
 
         if format == "json":
-            with open(input_path, "r") as fp:
-                versions = json.load(fp)
-                for name, version in versions.items():
-                    version_name = get_version_name(version)
-                    step_name = f"+ {name}@{version_name}"
-                    try:
-                        if not self.packman.install_package(
-                            name=name, version=version, on_progress=on_progress
-                        ):
-                            # not_installed += 1
-                            self.output.write_step_error(step_name, "already installed")
-                        else:
-                            self.output.write_step_complete(step_name)
-                    except Exception as exc:
-                        logger.exception(exc)
-                        self.output.write_step_error(step_name, str(exc))
-                    except KeyboardInterrupt:
-                        self.output.write_step_error(step_name, "cancelled")
+            versions = load_json(Path(input_path).read_bytes())
+            for name, version in versions.items():
+                version_name = get_version_name(version)
+                step_name = f"+ {name}@{version_name}"
+                try:
+                    if not self.packman.install_package(
+                        name=name, version=version, on_progress=on_progress
+                    ):
+                        # not_installed += 1
+                        self.output.write_step_error(step_name, "already installed")
+                    else:
+                        self.output.write_step_complete(step_name)
+                except Exception as exc:
+                    logger.exception(exc)
+                    self.output.write_step_error(step_name, str(exc))
+                except KeyboardInterrupt:
+                    self.output.write_step_error(step_name, "cancelled")
 
         elif format == "zip":
             with self.packman.create_operation() as op:
@@ -163,6 +179,7 @@ class ImportCommand(Command):
                     os.path.join(zip_root, "manifest.json"), update_root=False
                 )
 
+                created_dirs: Set[str] = set()
                 for name, package in zip_manifest.packages.items():
                     version_name = get_version_name(package.version)
                     step_name = f"+ {name}@{version_name}"
@@ -182,12 +199,24 @@ class ImportCommand(Command):
                         )
                         on_step_progress(0.0)
 
-                        for relfile in package.files:
+                        files = {
+                            relfile: os.path.join(self.packman.root_dir, relfile)
+                            for relfile in package.files
+                        }
+
+                        # Create each distinct parent directory once, rather than once per file
+                        dests = {
+                            os.path.normpath(os.path.dirname(file))
+                            for file in files.values()
+                        }
+                        dests -= created_dirs
+                        dests.discard(".")
+                        for dest in sorted(dests, key=len):
+                            os.makedirs(dest, exist_ok=True)
+                        created_dirs |= dests
+
+                        for relfile, file in files.items():
                             tmpfile = os.path.join(zip_root, relfile)
-                            file = os.path.join(self.packman.root_dir, relfile)
-                            dest = os.path.normpath(os.path.dirname(file))
-                            if dest != ".":
-                                os.makedirs(dest, exist_ok=True)
                             op.copy_file(tmpfile, file)
                             on_step_progress.advance()
 
@@ -202,7 +231,7 @@ class ImportCommand(Command):
                     else:
                         self.output.write_step_complete(step_name)
 
-                self.packman.commit_backups(op)
+                self.packman.commit_backups(op, manifest=manifest)
                 manifest.update_files(self.packman.manifest_path)
 
         else:
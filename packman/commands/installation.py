@@ -1,8 +1,8 @@
 from argparse import ArgumentParser
 from typing import List, Optional
 
-from loguru import logger
 from packman.commands.util import get_version_name
+from packman.utils.logger import logger
 from packman.utils.operation import StateFileExistsError
 
 from .command import Command
@@ -50,13 +50,10 @@ class InstallCommand(Command):
         output.step_count = len(packages)
         not_installed = 0
         for package in packages:
-            at_idx = package.find("@")
-            if at_idx == -1:
-                name = package
+            name, sep, version = package.partition("@")
+            if not sep:
                 version_info = self.packman.get_latest_version_info(name)
                 version = version_info.version
-            else:
-                name, version = package.split("@")
 
             version_name = get_version_name(version)
             step_name = f"+ {name}@{version_name}"
@@ -5,9 +5,8 @@
 from argparse import ArgumentParser
 from typing import Iterable, List, Optional, Tuple
 
-from loguru import logger
 from packman.commands.util import get_version_name
-from packman.models.package_definition import PackageDefinition
+from packman.utils.logger import logger
 
 from .command import Command, ListCommand
 
@@ -15,13 +14,11 @@ from .command import Command, ListCommand
 class PackageListCommand(ListCommand):
     help = "Lists available packages"
 
-    def get_iterable(self) -> Iterable[Tuple[str, PackageDefinition]]:
-        return self.packman.package_definitions()
+    def get_iterable(self) -> Iterable[Tuple[str, Tuple[str, str]]]:
+        return self.packman.package_headers()
 
-    def write_iterable(self, iterable: Iterable[Tuple[str, PackageDefinition]]) -> None:
-        self.output.write_table(
-            [[name, config.name, config.description] for name, config in iterable]
-        )
+    def write_iterable(self, iterable: Iterable[Tuple[str, Tuple[str, str]]]) -> None:
+        self.output.write_table([[name, *header] for name, header in iterable])
 
 
 class VersionListCommand(ListCommand):
@@ -30,11 +27,19 @@ class VersionListCommand(ListCommand):
     def configure_parser(self, parser: ArgumentParser) -> None:
         super().configure_parser(parser)
         parser.add_argument("package", help="The package to list versions for")
+        parser.add_argument(
+            "--all-sources",
+            help="Lists versions from every source rather than only the first source with any versions",
+            action="store_true",
+            dest="all_sources",
+        )
 
-    def get_iterable(self, package: str) -> Iterable[str]:
-        return self.packman.available_versions(package)
+    def get_iterable(self, package: str, all_sources: bool = False) -> Iterable[str]:
+        return self.packman.available_versions(package, all_sources=all_sources)
 
-    def write_iterable(self, iterable: Iterable[str], package: str) -> None:
+    def write_iterable(
+        self, iterable: Iterable[str], package: str, all_sources: bool = False
+    ) -> None:
         for version in iterable:
             self.output.write(version)
 
@@ -44,13 +49,12 @@ class InstalledPackageListCommand(ListCommand):
 
     def get_iterable(self) -> List[List[str]]:
         manifest = self.packman.manifest
-        packages = {key: value for key, value in self.packman.package_definitions()}
+        packages = dict(self.packman.package_headers(names=manifest.packages.keys()))
         return [
             [
                 name,
                 get_version_name(info.version),
-                packages[name].name,
-                packages[name].description,
+                *packages.get(name, ("", "")),
             ]
             for name, info in manifest.packages.items()
         ]
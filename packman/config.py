@@ -1,9 +1,8 @@
 import os
 from enum import Enum
-from sys import stderr
 
-import yaml
-from loguru import logger
+from packman.utils.logger import logger
+from packman.utils.serialization import load_yaml
 from pydantic.main import BaseModel
 
 _dir = os.path.dirname(__file__)
@@ -37,9 +36,8 @@ class Config(BaseModel):
     log_level: LogLevel = LogLevel(os.environ.get("PACKMAN_LOGGING", "CRITICAL"))
 
     def configure_logger(self) -> None:
-        # Set up logger
-        logger.remove()
-        logger.add(stderr, level=self.log_level)
+        # Set up logger; loguru itself is only loaded once something is logged at this level
+        logger.configure(level=self.log_level.value)
 
 
 def get_config_path() -> str:
@@ -48,11 +46,10 @@ def get_config_path() -> str:
 
 def read_config(path: str = get_config_path()) -> Config:
     try:
-        with open(path) as fp:
-            raw = yaml.load(fp, Loader=yaml.SafeLoader)
-            if raw is None:
-                return Config()
-            cfg = Config(**raw)
-            return cfg
+        raw = load_yaml(path)
+        if raw is None:
+            return Config()
+        cfg = Config(**raw)
+        return cfg
     except FileNotFoundError:
         return Config()
@@ -1,25 +1,39 @@
-import filecmp
 import os
-import shutil
-from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import cached_property, lru_cache
 from hashlib import md5
-from typing import Iterable, List, Optional, Set, Tuple, Type, Union
-
-from git.repo.base import Repo
-from loguru import logger
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from packman.config import Config, read_config
 from packman.models.manifest import Manifest
 from packman.models.package_definition import PackageDefinition
-from packman.models.package_source import PackageVersion
-from packman.utils.cache import Cache
+from packman.models.package_source import PackageSource, PackageVersion
+from packman.utils.cache import Cache, CacheMissError
 from packman.utils.files import (
     backup_path,
-    checksum,
+    checksum_algorithm,
+    checksum_algorithm_available,
+    copy_file,
+    files_equal,
+    iter_checksums,
+    iter_relative_files,
     remove_path,
-    resolve_case,
     temp_path,
 )
+from packman.utils.logger import logger
 from packman.utils.operation import Operation
 from packman.utils.progress import (
     ProgressCallback,
@@ -28,6 +42,8 @@ from packman.utils.progress import (
     progress_noop,
 )
 
+T = TypeVar("T")
+
 
 class VersionNotFoundError(Exception):
     """
@@ -43,10 +59,16 @@ class VersionNotFoundError(Exception):
 class NoSourcesError(Exception):
     """
     Raised when no package could be retrieved for the given version from any of the package's defined sources.
+
+    Causes are given as 2-tuples of the name of each source tried and the exception it raised.
     """
 
     def __init__(
-        self, message: str, package: str, version: str, causes: List[Exception]
+        self,
+        message: str,
+        package: str,
+        version: str,
+        causes: List[Tuple[str, Exception]],
     ) -> None:
         super().__init__(message)
         self.package = package
@@ -62,6 +84,26 @@ class NoFilesError(Exception):
     ...
 
 
+def _new_versions(versions: Iterable[str], seen: Set[str]) -> List[str]:
+    """
+    Returns the given versions that are not yet in seen, in order and without duplicates, and adds them to seen.
+    """
+    if not seen:
+        new = list(dict.fromkeys(versions))
+    else:
+        new = [version for version in dict.fromkeys(versions) if version not in seen]
+    seen.update(new)
+    return new
+
+
+@lru_cache(maxsize=None)
+def _operation_key(root_dir: str) -> str:
+    # Operation state files are named by this key, so it must stay MD5 for interrupted operations to be recoverable
+    key_bytes = bytes(os.path.realpath(root_dir), "utf-8")
+    key_md5 = md5(key_bytes)
+    return key_md5.hexdigest()
+
+
 class Packman:
     def __init__(
         self,
@@ -76,11 +118,17 @@ class Packman:
         self.git_definition_dir = git_config_dir
         self.git_url = git_url
         self.root_dir = root_dir
+        self._definition_paths: Optional[Dict[str, str]] = None
 
-        key_bytes = bytes(os.path.realpath(self.root_dir), "utf-8")
-        key_md5 = md5(key_bytes)
-        self.key = key_md5.hexdigest()
-        logger.debug(f"using operation key: {self.key}")
+    @cached_property
+    def key(self) -> str:
+        """
+        Returns the key identifying this manager's operations, derived from its root directory.
+        """
+        # Relative paths are made absolute first so that the cached key still follows the working directory
+        key = _operation_key(os.path.abspath(self.root_dir))
+        logger.debug(f"using operation key: {key}")
+        return key
 
     @classmethod
     def from_config(cls: Type["Packman"], cfg: Config) -> "Packman":
@@ -114,6 +162,7 @@ class Packman:
         """
         package = self.package_definition(name)
         last_exc: Optional[Exception] = None
+        # Sources are queried one at a time so that later sources are only hit when earlier ones fail
         for source in package.sources:
             try:
                 return source.get_version(version)
@@ -167,6 +216,18 @@ class Packman:
         """
         return Manifest.from_json(self.manifest_path)
 
+    @contextmanager
+    def _discard_manifest_changes_on_error(self) -> Iterator[None]:
+        """
+        Discards any changes made to the manifest within the context if it raises, so that the manifest is next read
+        from the manifest file as last written.
+        """
+        try:
+            yield
+        except BaseException:
+            self.__dict__.pop("manifest", None)
+            raise
+
     def package_path(self, name: str) -> str:
         """
         Returns the path to the definition file for the given package.
@@ -175,22 +236,47 @@ class Packman:
 
     def validate(self, name: str) -> Iterable[str]:
         """
-        Validates the given package's files, returning an iterable of each invalid file path.
+        Validates the given package's files, returning an iterable of each invalid file path in manifest order.
+
+        Files whose checksums are malformed or were recorded with an algorithm unavailable in this environment cannot
+        be verified and so are reported as invalid.
         """
         manifest = self.manifest
         package = manifest.packages[name]
-        for file in package.checksums:
-            if checksum(file) != package.checksums[file]:
+        algorithms: Dict[str, str] = {}
+        invalid: Set[str] = set()
+        for file, chk in package.checksums.items():
+            try:
+                algorithm = checksum_algorithm(chk)
+            except ValueError:
+                logger.warning(f"invalid checksum: {file}")
+                invalid.add(file)
+                continue
+            if checksum_algorithm_available(algorithm):
+                algorithms[file] = algorithm
+            else:
+                logger.warning(f"checksum algorithm unavailable: {file} ({algorithm})")
+                invalid.add(file)
+        for file, chk in iter_checksums(algorithms, algorithms=algorithms):
+            if chk != package.checksums[file]:
                 logger.warning(f"checksum mismatch: {file}")
+                invalid.add(file)
+        # Checksums complete in no particular order, so report them in a stable one
+        for file in package.checksums:
+            if file in invalid:
                 yield file
 
-    def commit_backups(self, operation: Operation) -> None:
+    def commit_backups(self, operation: Operation, manifest: Optional[Manifest] = None) -> None:
         """
         Commits all temporary backup files for the given Operation to a permanent backup directory.
+
+        :param manifest: The manifest to record the backups in; defaults to this manager's manifest.
         """
-        manifest = self.manifest
+        if manifest is None:
+            manifest = self.manifest
         modified_files = manifest.modified_files
         original_files = manifest.original_files
+        created_dirs: Set[str] = set()
         for original_path, temporary_path in operation.backups.items():
             if (
                 original_path not in modified_files
@@ -199,8 +285,11 @@ class Packman:
                 # commit temporary backup to permanence
                 logger.debug(f"committing backup for {original_path}")
                 permanent_path = backup_path(original_path)
-                os.makedirs(os.path.dirname(permanent_path), exist_ok=True)
-                shutil.copy2(temporary_path, permanent_path)
+                permanent_dir = os.path.dirname(permanent_path)
+                if permanent_dir not in created_dirs:
+                    os.makedirs(permanent_dir, exist_ok=True)
+                    created_dirs.add(permanent_dir)
+                copy_file(temporary_path, permanent_path)
                 manifest.original_files[original_path] = permanent_path
 
     def install_package(
@@ -257,7 +346,7 @@ class Packman:
         # endregion
         # region Cache
 
-        source_errors: List[Exception] = []
+        source_errors: List[Tuple[str, Exception]] = []
 
         logger.info(f"{context} - checking cache")
         cache_source = Cache(name=name)
@@ -272,11 +361,17 @@ class Packman:
                     operation=op,
                     on_progress=on_step_progress,
                 )
-            except Exception as exc:
+            except CacheMissError as exc:
+                # An expected outcome rather than an error, so skip formatting a traceback
                 logger.info(f"{context} - not found in cache")
-                err = Exception("not found in cache")
-                err.__cause__ = exc
-                source_errors.append(err)
+                source_errors.append(("cache", exc))
+                op.abort()
+                op = None
+                cache_miss = True
+            except Exception as exc:
+                logger.error(f"{context} - failed to load from cache")
+                logger.exception(exc)
+                source_errors.append(("cache", exc))
                 op.abort()
                 op = None
                 cache_miss = True
@@ -311,9 +406,7 @@ class Packman:
                 except Exception as exc:
                     logger.error(f"failed to load from source: {source}")
                     logger.exception(exc)
-                    err = Exception(f"failed to load from source: {source}")
-                    err.__cause__ = exc
-                    source_errors.append(err)
+                    source_errors.append((str(source), exc))
                     op.abort()
                     op = None
                     continue
@@ -341,7 +434,7 @@ class Packman:
                 causes=source_errors,
             )
 
-        with op:
+        with op, self._discard_manifest_changes_on_error():
             assert package_path, "operation did not end with a path"
 
             # region Cache update
@@ -379,7 +472,7 @@ class Packman:
             # endregion
             # region Manifest
 
-            self.commit_backups(op)
+            self.commit_backups(op, manifest=manifest)
 
             manifest.add_package(
                 name,
@@ -414,7 +507,8 @@ class Packman:
         except KeyError:
             return False
 
-        manifest.update_files(self.manifest_path, on_progress=on_progress)
+        with self._discard_manifest_changes_on_error():
+            manifest.update_files(self.manifest_path, on_progress=on_progress)
         on_progress(1.0)
 
         logger.success(f"{name} - uninstalled")
@@ -424,6 +518,8 @@ class Packman:
         """
         Updates the local package definitions with the latest from the defined remote sources.
         """
+        from git.repo.base import Repo
+
         on_progress(0.0)
 
         dir = temp_path()
@@ -433,38 +529,87 @@ class Packman:
             logger.debug(
                 f"retrieving config files from {self.git_url}/{self.git_definition_dir}"
             )
-            Repo.clone_from(url=self.git_url, to_path=dir, depth=1)
+            # Only fetch the blobs needed to check out the definition directory
+            repo = Repo.clone_from(
+                url=self.git_url,
+                to_path=dir,
+                depth=1,
+                multi_options=["--filter=blob:none", "--sparse", "--single-branch", "--no-tags"],
+            )
+            repo.git.sparse_checkout("set", self.git_definition_dir)
             cfg_path = os.path.join(dir, self.git_definition_dir)
-            for root, _, files in os.walk(cfg_path):
-                for file in files:
-                    src = os.path.join(root, file)
-                    src_relpath = os.path.relpath(src, cfg_path)
-                    dest = os.path.join(self.definition_dir, src_relpath)
-                    if not os.path.exists(dest) or not filecmp.cmp(src, dest):
-                        logger.info(f"updating {dest}")
-                        shutil.copy2(src, dest)
-                        updated = True
+            # Scan the local definitions once up front rather than checking whether each destination path exists
+            try:
+                dest_entries = dict(iter_relative_files(self.definition_dir))
+            except FileNotFoundError:
+                dest_entries = {}
+            for src_relpath, src_entry in iter_relative_files(cfg_path):
+                dest = os.path.join(self.definition_dir, src_relpath)
+                dest_entry = dest_entries.get(src_relpath)
+                if dest_entry is None:
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                elif files_equal(src_entry.path, dest):
+                    # files_equal compares sizes before reading either file
+                    continue
+                logger.info(f"updating {dest}")
+                copy_file(src_entry.path, dest)
+                updated = True
 
             on_progress(1.0)
         finally:
             remove_path(dir)
+            self._definition_paths = None
         if not updated:
             logger.info("no changes")
         return updated
 
-    def available_versions(self, name: str) -> Iterable[str]:
+    def available_versions(self, name: str, all_sources: bool = True) -> Iterable[str]:
         """
         Returns an iterable of all versions available for the given package.
 
+        Sources are only queried once the iterable is first consumed.
+
+        Sources which fail are skipped.
+
+        :param all_sources: If False, stop after the first source that provides any versions.
+
         :raises FileNotFoundError: If the package cannot be found.
+        :raises VersionNotFoundError: If every source queried failed.
         """
         package = self.package_definition(name)
         versions: Set[str] = set()
-        for source in package.sources:
-            for version in source.get_versions():
-                if version not in versions:
-                    versions.add(version)
-                    yield version
+        succeeded = False
+        last_exc: Optional[Exception] = None
+
+        def get_versions(source: PackageSource) -> Union[List[str], Exception]:
+            try:
+                return list(source.get_versions())
+            except Exception as exc:
+                logger.error(f"failed to load from source: {source}")
+                logger.exception(exc)
+                return exc
+
+        # Sources are usually remote, so query them all at once rather than waiting on each in turn; results are still
+        # yielded in source order. Only the first source is usually needed otherwise, so query those one at a time
+        executor_context = ThreadPoolExecutor(max_workers=len(package.sources)) if all_sources else nullcontext()
+        with executor_context as executor:
+            if executor is not None:
+                results = executor.map(get_versions, package.sources)
+            else:
+                results = map(get_versions, package.sources)
+            for result in results:
+                if isinstance(result, Exception):
+                    last_exc = result
+                    continue
+                succeeded = True
+                yield from _new_versions(result, versions)
+                if versions and not all_sources:
+                    return
+
+        if not succeeded and last_exc is not None:
+            raise VersionNotFoundError(
+                f"no versions for {name} ({last_exc})", package=name, version=None
+            )
 
     def package_definition(self, name: str) -> PackageDefinition:
         """
@@ -472,31 +617,83 @@ class Packman:
 
         :raises FileNotFoundError: If the package cannot be found.
         """
-        path = self.package_path(name)
-
-        # Enforce case for consistency with uninstall() and across platforms
-        path_cased = resolve_case(path)
-        relpath_cased = os.path.relpath(path_cased, self.definition_dir)
-        pathname = relpath_cased[:-4].replace(os.path.sep, "/")
-        if name != pathname:
-            raise FileNotFoundError(f"{name=} does not match {pathname=}")
+        # Names are matched against the real file names, enforcing case for consistency with uninstall() and across
+        # platforms
+        path = self.definition_paths().get(name)
+        if path is None:
+            # The definition may have been added since the definition directory was last scanned
+            self._definition_paths = None
+            path = self.definition_paths().get(name)
+        if path is None:
+            raise FileNotFoundError(f"no definition found for {name=}")
 
         return PackageDefinition.from_yaml(path)
 
+    def definition_paths(self) -> Dict[str, str]:
+        """
+        Returns a dictionary mapping the name of each available package to the path of its definition file.
+
+        The definition directory is scanned once and the result reused until definitions are next updated, or until
+        package_definition fails to find a package.
+        """
+        if self._definition_paths is None:
+            self._definition_paths = {
+                name.replace(os.path.sep, "/"): path
+                for name, path in self._definition_files()
+                if path.endswith(".yml")
+            }
+        return self._definition_paths
+
+    def _definition_files(self) -> Iterable[Tuple[str, str]]:
+        """
+        Returns an iterable of 2-tuples containing the name and path of all available package definition files.
+        """
+        for relpath, entry in iter_relative_files(self.definition_dir):
+            name, _ = os.path.splitext(relpath)
+            yield name, entry.path
+
+    def _load_definition_files(
+        self, load: Callable[[str], T], names: Optional[Iterable[str]] = None
+    ) -> Iterable[Tuple[str, T]]:
+        """
+        Loads package definition files using the given function, returning an iterable of 2-tuples containing the
+        name and result for each package in order.
+
+        :param names: If given, only load the definitions for these packages; otherwise, load all available packages.
+
+        Files which fail to load are logged and skipped.
+        """
+        if names is None:
+            files = self._definition_files()
+        else:
+            files = ((name, self.package_path(name)) for name in names)
+        for name, path in files:
+            try:
+                result = load(path)
+            except Exception as exc:
+                logger.error(f"Failed to read {os.path.basename(path)}")
+                logger.exception(exc)
+                continue
+            yield name, result
+
     def package_definitions(self) -> Iterable[Tuple[str, PackageDefinition]]:
         """
         Returns an iterable of 2-tuples containing the name and definition of all available packages.
         """
-        for root, _, files in os.walk(self.definition_dir):
-            for file in files:
-                try:
-                    path = os.path.join(root, file)
-                    relpath = os.path.relpath(path, self.definition_dir)
-                    name = relpath[: relpath.rindex(os.extsep)]
-                    yield name, PackageDefinition.from_yaml(path)
-                except Exception as exc:
-                    logger.error(f"Failed to read {file}")
-                    logger.exception(exc)
+        return self._load_definition_files(PackageDefinition.from_yaml)
+
+    def package_headers(
+        self, names: Optional[Iterable[str]] = None
+    ) -> Iterable[Tuple[str, Tuple[str, str]]]:
+        """
+        Returns an iterable of 2-tuples containing the name and a (human readable name, description) header of all
+        available packages, or of only the given packages if any names are given.
+
+        Cheaper than package_definitions() where the rest of each definition is not needed.
+        """
+        return self._load_definition_files(
+            PackageDefinition.header_from_yaml, names=names
+        )
 
     def recover(self, on_progress: ProgressCallback) -> None:
         with Operation.recover(key=self.key) as op:
@@ -1,17 +1,28 @@
-import json
 import os
 import shutil
 from copy import deepcopy
+from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Set, Union
-
-from loguru import logger
-from packman.utils.files import checksum, remove_path
+from uuid import uuid4
+
+from packman.utils.files import (
+    checksum_many,
+    matches_checksum,
+    remove_file,
+    remove_path,
+)
+from packman.utils.logger import logger
 from packman.utils.progress import ProgressCallback, StepProgress, progress_noop
+from packman.utils.serialization import dump_json, load_json
 from pydantic import BaseModel, Field
 
 
 def replace_root_path(*, path: str, new_root_path: str, old_root_path: str) -> str:
-    unrooted = os.path.relpath(path, old_root_path)
+    if old_root_path == "." and not os.path.isabs(path):
+        # Already relative to the old root; skip relpath, which resolves both paths against the working directory
+        unrooted = path
+    else:
+        unrooted = os.path.relpath(path, old_root_path)
     result = os.path.normpath(os.path.join(new_root_path, unrooted))
     return result
 
@@ -24,7 +35,7 @@ class BaseModelWithPrivateAttributes(BaseModel):
             super().__setattr__(name, value)
 
     def dict(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
-        exclude = kwargs.pop("exclude")
+        exclude = kwargs.pop("exclude", None)
         if exclude:
             exclude = set(exclude)
         else:
@@ -72,10 +83,7 @@ class ManifestPackage(BaseModelWithPrivateAttributes):
         Computes checksums for files that do not already have checksums; does not recompute pre-existing checksums.
         If a file for some reason gets updated, first delete it from the checksum dictionary.
         """
-        self.checksums = {}
-        for file in self.files:
-            if file not in self.checksums:
-                self.checksums[file] = checksum(file)
+        self.checksums = checksum_many(self.files)
 
     def update_path_root(self, root_path: str) -> None:
         """
@@ -202,10 +210,8 @@ class Manifest(BaseModelWithPrivateAttributes):
 
         for file in self.file_map:
             if file not in new_file_map:
-                curr_chk = checksum(file)
-                if remove_orphans or any(
-                    chk == curr_chk
-                    for chk in self._file_checksums[os.path.normpath(file)]
+                if remove_orphans or matches_checksum(
+                    file, self._file_checksums[os.path.normpath(file)]
                 ):
                     logger.debug(f"cleaning up {file}")
                     if file in self.original_files:
@@ -240,17 +246,27 @@ class Manifest(BaseModelWithPrivateAttributes):
         Writes the manifest in JSON format to the given path.
 
         File paths stored within the manifest will reflect the relative path of the path given.
+
+        The manifest is written to a temporary file which then replaces the given path, so that an interrupted write
+        cannot leave a partial manifest behind.
         """
         path_dir = os.path.normpath(os.path.dirname(path))
         if path_dir != ".":
             os.makedirs(path_dir, exist_ok=True)
-        with open(path, "w") as fp:
-            if path_dir != ".":
-                clone = self.deepcopy()
-                clone.update_path_root(".")
-                fp.write(clone.json(indent=2))
-            else:
-                fp.write(self.json(indent=2))
+            clone = self.deepcopy()
+            clone.update_path_root(".")
+            data = dump_json(clone.dict())
+        else:
+            data = dump_json(self.dict())
+
+        temp_path = f"{path}.{uuid4()}.tmp"
+        try:
+            with open(temp_path, "wb") as fp:
+                fp.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            remove_file(temp_path)
+            raise
 
     def update_path_root(self, root_path: str) -> None:
         """
@@ -315,9 +331,8 @@ class Manifest(BaseModelWithPrivateAttributes):
         Manifest.
         """
         try:
-            with open(path, "r") as fp:
-                raw = json.load(fp)
-                manifest = Manifest(**raw)
+            raw = load_json(Path(path).read_bytes())
+            manifest = Manifest(**raw)
         except FileNotFoundError:
             manifest = Manifest()
 
@@ -1,13 +1,31 @@
-from typing import Dict, List
+import os
+from typing import Dict, List, Optional, Tuple
 
-import yaml
 from packman.models.install_step import InstallStep
 from packman.models.package_source import PackageSource
-from pydantic import BaseModel
+from packman.utils.serialization import load_yaml, load_yaml_header
+from pydantic import BaseModel, ValidationError
 from pydantic.fields import Field
 from pydantic.main import Extra
 
-_cache: Dict[str, "PackageDefinition"] = {}
+_cache: Dict[str, Tuple[Tuple[int, int], "PackageDefinition"]] = {}
+_HEADER_KEYS = ("name", "description")
+
+
+def _cache_key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _cache_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _cached(key: str, stamp: Tuple[int, int]) -> Optional["PackageDefinition"]:
+    cached = _cache.get(key)
+    if cached is None or cached[0] != stamp:
+        return None
+    return cached[1]
 
 
 class PackageDefinition(BaseModel):
@@ -46,11 +64,47 @@ class PackageDefinition(BaseModel):
     def from_yaml(path: str) -> "PackageDefinition":
         """
         Attempts to load a package definition file from the given YAML file.
+
+        Definitions are cached until the file's modification time or size changes.
         """
-        if path in _cache:
-            return _cache[path]
-        with open(path, "r") as fp:
-            raw = yaml.load(fp, Loader=yaml.SafeLoader)
-            cfg = PackageDefinition(**raw)
-            _cache[path] = cfg
+        key = _cache_key(path)
+        # Stat before reading so that a change made mid-read is picked up next time
+        stamp = _cache_stamp(path)
+        cfg = _cached(key, stamp)
+        if cfg is not None:
             return cfg
+        raw = load_yaml(path)
+        cfg = PackageDefinition(**raw)
+        _cache[key] = (stamp, cfg)
+        return cfg
+
+    @staticmethod
+    def header_from_yaml(path: str) -> Tuple[str, str]:
+        """
+        Returns the name and description from the given YAML package definition file.
+
+        Only the start of the file is parsed where possible; otherwise, the full definition is loaded.
+
+        :raises ValidationError: If the name or description is invalid.
+        """
+        cfg = _cached(_cache_key(path), _cache_stamp(path))
+        if cfg is not None:
+            return cfg.name, cfg.description
+        header = load_yaml_header(path, keys=_HEADER_KEYS)
+        if header is None or "name" not in header:
+            cfg = PackageDefinition.from_yaml(path)
+            return cfg.name, cfg.description
+        # The rest of the definition is not validated here, but the header values are at least held to the same
+        # constraints as a full load
+        values: Dict[str, str] = {}
+        errors = []
+        for key in _HEADER_KEYS:
+            field = PackageDefinition.__fields__[key]
+            values[key], error = field.validate(
+                header.get(key, field.default), values, loc=key, cls=PackageDefinition
+            )
+            if error:
+                errors.append(error)
+        if errors:
+            raise ValidationError(errors, PackageDefinition)
+        return values["name"], values["description"]
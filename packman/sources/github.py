@@ -4,9 +4,9 @@ import os
 from typing import Any, Dict, Iterable, List, Optional
 from urllib import parse as urlparse
 
-from loguru import logger
 from packman.api.http import HTTPAPI
 from packman.models.package_source import BasePackageSource, PackageVersion
+from packman.utils.logger import logger
 from packman.utils.operation import Operation
 from packman.utils.progress import ProgressCallback, StepProgress, progress_noop
 from pydantic import Field
@@ -72,10 +72,9 @@ def _is_usable_archive(asset: Dict[str, Any]) -> bool:
         logger.warning("no content_type field for asset")
 
     if "name" in asset:
-        name = asset["name"]
-        extidx = name.rfind(".")
-        if extidx != -1:
-            if name[extidx:] in supported_extensions:
+        _, ext = os.path.splitext(asset["name"])
+        if ext:
+            if ext in supported_extensions:
                 return True
         else:
             logger.warning("no extension for asset")
@@ -83,11 +82,9 @@ def _is_usable_archive(asset: Dict[str, Any]) -> bool:
         logger.warning("no name field for asset")
 
     if "browser_download_url" in asset:
-        name = os.path.basename(asset["browser_download_url"])
-        extidx = name.rfind(".")
-        if extidx != -1:
-            if name[extidx:] in supported_extensions:
-                return False
+        _, ext = os.path.splitext(asset["browser_download_url"])
+        if ext in supported_extensions:
+            return False
     else:
         logger.warning("no browser_download_url field for asset")
 
@@ -85,10 +85,7 @@ class SpaceDockPackageSource(BasePackageSource):
         return SpaceDockAPI(mod_id=self.id)
 
     def _get_option_name(self, download_path: str) -> str:
-        option = os.path.basename(download_path)
-        ext_idx = option.rfind(".")
-        if ext_idx > 0:
-            option = option[:ext_idx]
+        option, _ = os.path.splitext(os.path.basename(download_path))
         return option
 
     def _to_version_info(self, mod_version: Version) -> PackageVersion:
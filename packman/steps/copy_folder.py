@@ -3,8 +3,8 @@ from glob import iglob
 from pathlib import Path, PurePath
 from typing import Dict, Iterable, List, Set
 
-from loguru import logger
 from packman.models.install_step import BaseInstallStep
+from packman.utils.logger import logger
 from packman.utils.operation import Operation
 from packman.utils.progress import ProgressCallback, StepProgress, progress_noop
 from pydantic import Field
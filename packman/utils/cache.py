@@ -9,6 +9,12 @@ from packman.utils.operation import Operation
 from packman.utils.progress import ProgressCallback, progress_noop
 
 
+class CacheMissError(Exception):
+    """
+    Raised when the requested package version has not been cached.
+    """
+
+
 class Cache:
     def __init__(self, name: str) -> None:
         self.name = name
@@ -22,7 +28,7 @@ class Cache:
     ) -> None:
         cache_path = self.get_path(version, ".zip")
         if not os.path.exists(cache_path):
-            raise Exception("not found")
+            raise CacheMissError(f"not found in cache: {self.name}@{version}")
         operation.extract_archive(cache_path)
 
     def get_versions(self) -> Iterable[str]:
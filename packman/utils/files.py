@@ -3,13 +3,24 @@ import os
 import shutil
 import sys
 import tempfile
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from types import TracebackType
-from typing import Callable, Tuple, Type
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
 from uuid import uuid4
 
 import appdirs
-from loguru import logger
+from packman.utils.logger import logger
 
 if os.name == "nt":
     import win32api
@@ -25,6 +36,12 @@ if os.name == "nt":
         FILE_ATTRIBUTE_HIDDEN | win32con.FILE_ATTRIBUTE_READONLY
     )
 
+if sys.platform.startswith("linux"):
+    import fcntl
+
+    # From linux/fs.h
+    FICLONE = 0x40049409
+
 REMOVE_FUNCS = (os.remove, os.rmdir, os.unlink)
 
 
@@ -47,12 +64,132 @@ def backup_path(src: str) -> str:
     return os.path.join(backup_dir(), key_md5_str)
 
 
-def checksum(path: str) -> str:
-    hash = hashlib.sha256()
+_CHECKSUM_BUFFER_SIZE = 1024 * 1024
+_CHECKSUM_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Checksums only detect changes to files, so prefer xxHash where installed as it is far faster than any hashlib
+# algorithm; checksums are prefixed with their algorithm, so those recorded with a different one remain verifiable
+try:
+    import xxhash
+
+    DEFAULT_CHECKSUM_ALGORITHM = "xxh3_128"
+except ImportError:
+    xxhash = None
+    DEFAULT_CHECKSUM_ALGORITHM = "sha256"
+
+
+def _new_hash(algorithm: str) -> Any:
+    if algorithm == "xxh3_128":
+        if xxhash is None:
+            raise ValueError(f"checksum algorithm requires xxhash to be installed: {algorithm}")
+        return xxhash.xxh3_128()
+    return hashlib.new(algorithm)
+
+
+def checksum_algorithm_available(algorithm: str) -> bool:
+    """
+    Returns whether checksums can be computed with the given algorithm in this environment.
+    """
+    if algorithm == "xxh3_128":
+        return xxhash is not None
+    return algorithm in hashlib.algorithms_available
+
+
+def checksum_algorithm(chk: str) -> str:
+    """
+    Returns the name of the algorithm used to compute the given checksum.
+    """
+    algorithm, sep, _ = chk.partition(":")
+    if not sep:
+        raise ValueError(f"invalid checksum: {chk}")
+    return algorithm
+
+
+def checksum(path: str, algorithm: Optional[str] = None) -> str:
+    """
+    Computes the checksum of the given file, using the default algorithm if none is given.
+
+    Safe to call from multiple threads at once; hashing releases the GIL, as does reading the file.
+    """
+    if algorithm is None:
+        algorithm = DEFAULT_CHECKSUM_ALGORITHM
+    hash = _new_hash(algorithm)
     with open(path, "rb") as fp:
-        for b in fp:
+        # Read fixed-size chunks rather than lines, which may be arbitrarily short or long in binary files
+        for b in iter(lambda: fp.read(_CHECKSUM_BUFFER_SIZE), b""):
             hash.update(b)
-    return f"{hash.name}:{hash.hexdigest()}"
+    return f"{algorithm}:{hash.hexdigest()}"
+
+
+def matches_checksum(path: str, checksums: Iterable[str]) -> bool:
+    """
+    Returns whether the given file matches any of the given checksums, each computed with its own algorithm.
+
+    Checksums whose algorithm is unavailable in this environment e.g. because xxhash is not installed never match.
+    """
+    computed: Dict[str, str] = {}
+    for chk in checksums:
+        algorithm = checksum_algorithm(chk)
+        if not checksum_algorithm_available(algorithm):
+            continue
+        if algorithm not in computed:
+            computed[algorithm] = checksum(path, algorithm=algorithm)
+        if computed[algorithm] == chk:
+            return True
+    return False
+
+
+def iter_checksums(
+    paths: Iterable[str], algorithms: Optional[Mapping[str, str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Computes the checksum of each of the given files concurrently, yielding each path and its checksum in the order
+    that they complete.
+
+    :param algorithms: The algorithm to use for each path; paths not included use the default algorithm.
+    """
+    if algorithms is None:
+        algorithms = {}
+    paths = list(paths)
+    if len(paths) < 2:
+        for path in paths:
+            yield path, checksum(path, algorithm=algorithms.get(path))
+        return
+
+    with ThreadPoolExecutor(max_workers=min(len(paths), _CHECKSUM_MAX_WORKERS)) as executor:
+        futures = {
+            executor.submit(checksum, path, algorithm=algorithms.get(path)): path for path in paths
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def checksum_many(paths: Iterable[str]) -> Dict[str, str]:
+    """
+    Computes the checksum of each of the given files concurrently, returning a dictionary mapping each path to its
+    checksum.
+    """
+    return dict(iter_checksums(paths))
+
+
+_COMPARE_BUFFER_SIZE = 64 * 1024
+
+
+def files_equal(a: str, b: str) -> bool:
+    """
+    Returns whether the two given files have identical contents.
+
+    Files of different sizes are rejected without reading either; otherwise contents are compared 64 KiB at a time.
+    """
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        if os.fstat(fa.fileno()).st_size != os.fstat(fb.fileno()).st_size:
+            return False
+        while True:
+            ba = fa.read(_COMPARE_BUFFER_SIZE)
+            if ba != fb.read(_COMPARE_BUFFER_SIZE):
+                return False
+            if not ba:
+                return True
 
 
 def is_hidden(path: str) -> bool:
@@ -96,37 +233,111 @@ def _noop_error_handler(
 _error_handler = _nt_error_handler if os.name == "nt" else _noop_error_handler
 
 
-def resolve_case(pathlike: str) -> str:
+def iter_files(path: str) -> Iterator[os.DirEntry]:
     """
-    On case-insensitive file-systems, resolves the given path's casing to match the real file or folder it points to.
+    Recursively yields an entry for each file under the given directory.
+
+    Unlike os.walk, directory entry types are read from the directory listing itself rather than stat'd one by one.
     """
-    path = Path(pathlike)
+    with os.scandir(path) as dirscan:
+        dirs = []
+        for entry in dirscan:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.is_file():
+                yield entry
+    for dir in dirs:
+        yield from iter_files(dir)
 
-    if not path.exists():
-        raise FileNotFoundError(f"no such file or directory: {path}")
 
-    parts = []
-    while str(path) not in (path.anchor, "", "."):
-        parent = path.parent
-        child = path.name
-        match: str = ""
-        with os.scandir(parent) as dirscan:
-            for file in dirscan:
-                name = file.name
-                if name == child:
-                    match = name
-                    break
-                elif name.lower() == child.lower():
-                    match = name
-        parts.append(match)
-        path = parent
+_COPY_BUFFER_SIZE = 128 * 1024
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError:
+        return False
+    return True
 
-    anchor = str(path)
-    if os.path.isabs(pathlike) or pathlike.startswith(anchor):
-        parts.append(anchor)
 
-    result = os.path.join(*parts[::-1])
-    return result
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    # Unlike copy_file_range, sendfile always writes at the destination's current position
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+# In order of preference
+_COPY_RANGE_FUNCS = [
+    func
+    for name, func in (("copy_file_range", _copy_file_range), ("sendfile", _sendfile))
+    if hasattr(os, name)
+]
+
+
+def copy_file(src: str, dst: str) -> None:
+    """
+    Copies the contents and metadata of the given file, like shutil.copy2 but without its extra checks on either path
+    beyond refusing to copy a file onto itself.
+
+    Where supported, the destination is created as a copy-on-write clone of the source, otherwise the contents are
+    copied in-kernel with copy_file_range or sendfile rather than through a Python-level buffer.
+    """
+    with open(src, "rb") as fsrc:
+        src_stat = os.fstat(fsrc.fileno())
+        try:
+            dst_stat = os.stat(dst)
+        except FileNotFoundError:
+            pass
+        else:
+            # Opening the destination for writing would otherwise truncate the source
+            if os.path.samestat(src_stat, dst_stat):
+                raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+        with open(dst, "wb") as fdst:
+            _copy_contents(fsrc, fdst, size=src_stat.st_size)
+    shutil.copystat(src, dst)
+
+
+def _copy_contents(fsrc: BinaryIO, fdst: BinaryIO, size: int) -> None:
+    src_fd = fsrc.fileno()
+    dst_fd = fdst.fileno()
+    if _reflink(src_fd, dst_fd):
+        return
+
+    offset = 0
+    for copy_range in _COPY_RANGE_FUNCS:
+        try:
+            while offset < size:
+                copied = copy_range(src_fd, dst_fd, offset, size - offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError:
+            # Not supported for these files e.g. across file-systems on older kernels
+            continue
+        break
+    if offset < size:
+        # Copy whatever remains the slow way
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst, length=_COPY_BUFFER_SIZE)
+
+
+def iter_relative_files(path: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Recursively yields the path relative to the given directory and the entry of each file under it.
+    """
+    # Entry paths are always built by joining onto the scanned path, so the prefix can simply be sliced off
+    prefix_len = len(os.path.join(path, ""))
+    for entry in iter_files(path):
+        yield entry.path[prefix_len:], entry
 
 
 def remove_file(path: str) -> None:
@@ -0,0 +1,78 @@
+from sys import stderr
+from typing import Any, Callable, Optional, TextIO, Tuple
+
+_LEVEL_NOS = {
+    "TRACE": 5,
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50,
+}
+
+
+def _log_method(name: str, level: str) -> Callable[..., None]:
+    level_no = _LEVEL_NOS[level]
+
+    def log(self: "LazyLogger", message: Any, *args: Any, **kwargs: Any) -> None:
+        if level_no < self._min_level_no:
+            return
+        # Skip this frame so that records point at the caller
+        method = getattr(self._loguru.opt(depth=1), name)
+        method(message, *args, **kwargs)
+
+    log.__name__ = name
+    return log
+
+
+class LazyLogger:
+    """
+    Stands in for loguru's logger, only importing loguru once a message is actually logged at or above the
+    configured level.
+
+    Until configured, all messages are passed through to loguru.
+    """
+
+    def __init__(self) -> None:
+        self._min_level_no = 0
+        self._sink: Optional[Tuple[TextIO, str]] = None
+        self._logger: Any = None
+
+    @property
+    def _loguru(self) -> Any:
+        if self._logger is None:
+            from loguru import logger
+
+            self._logger = logger
+            if self._sink is not None:
+                self._add_sink(*self._sink)
+        return self._logger
+
+    def _add_sink(self, sink: TextIO, level: str) -> None:
+        self._logger.remove()
+        self._logger.add(sink, level=level)
+
+    def configure(self, level: str, sink: TextIO = stderr) -> None:
+        """
+        Sets the minimum level of messages to log to the given sink, replacing any existing sinks.
+        """
+        self._min_level_no = _LEVEL_NOS[level]
+        self._sink = (sink, level)
+        if self._logger is not None:
+            self._add_sink(sink, level)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loguru, name)
+
+    trace = _log_method("trace", "TRACE")
+    debug = _log_method("debug", "DEBUG")
+    info = _log_method("info", "INFO")
+    success = _log_method("success", "SUCCESS")
+    warning = _log_method("warning", "WARNING")
+    error = _log_method("error", "ERROR")
+    exception = _log_method("exception", "ERROR")
+    critical = _log_method("critical", "CRITICAL")
+
+
+logger = LazyLogger()
@@ -6,10 +6,8 @@ from types import TracebackType
 from typing import Dict, Optional, Set, Type, Union
 from urllib import parse as urlparse
 
-import patoolib
-import requests
-from loguru import logger
 from packman.utils.files import remove_file, remove_path, temp_dir, temp_path
+from packman.utils.logger import logger
 from packman.utils.progress import ProgressCallback, StepProgress, progress_noop
 from packman.utils.uninterruptible import uninterruptible
 from pydantic import BaseModel
@@ -262,16 +260,13 @@ class Operation:
         ext: Optional[str] = "",
         on_progress: ProgressCallback = progress_noop,
     ) -> str:
+        import requests
+
         update_interval = timedelta(milliseconds=400)
 
         if ext is None:
             parsed_url = urlparse.urlparse(url)
-            url_path = parsed_url.path
-            extsep_idx = url_path.rfind(".")
-            if extsep_idx != -1:
-                ext = url_path[extsep_idx:]
-            else:
-                ext = ""
+            _, ext = os.path.splitext(parsed_url.path)
         res = requests.get(url, stream=True, timeout=self.request_timeout)
         res.raise_for_status()
         path = self.get_temp_path(ext=ext)
@@ -292,6 +287,8 @@ class Operation:
         return path
 
     def extract_archive(self, path: str) -> str:
+        import patoolib
+
         dir = self.get_temp_path()
         logger.debug(f"extracting {path} to {dir}")
         patoolib.extract_archive(path, outdir=dir, verbosity=-1)
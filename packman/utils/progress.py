@@ -1,6 +1,6 @@
 from typing import Callable, Optional
 
-from loguru import logger
+from packman.utils.logger import logger
 
 ProgressCallback = Callable[[float], None]
 progress_noop: ProgressCallback = lambda p: None
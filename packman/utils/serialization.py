@@ -0,0 +1,152 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Collection, Dict, Optional, Tuple, Type
+
+if TYPE_CHECKING:
+    import yaml
+
+_HEADER_SIZE = 4096
+_STR_TAG = "tag:yaml.org,2002:str"
+
+
+# NOTE: yaml is imported on first use rather than at module level, as it is slow to import relative to most commands
+
+
+@lru_cache(maxsize=None)
+def _yaml_loader() -> Type["yaml.SafeLoader"]:
+    # Prefer libyaml's C parser where PyYAML was built against it
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader  # type: ignore
+    return SafeLoader
+
+
+@lru_cache(maxsize=None)
+def _yaml_resolver() -> "yaml.resolver.Resolver":
+    import yaml
+
+    return yaml.resolver.Resolver()
+
+
+def _is_str(event: "yaml.ScalarEvent") -> bool:
+    import yaml
+
+    if event.tag is not None:
+        return event.tag == _STR_TAG
+    tag = _yaml_resolver().resolve(yaml.ScalarNode, event.value, event.implicit)
+    return tag == _STR_TAG
+
+
+def load_yaml(path: str) -> Any:
+    """
+    Parses the YAML file at the given path.
+
+    The file is read in a single call so that the parser is not left issuing small reads of its own.
+    """
+    data = Path(path).read_bytes()
+
+    import yaml
+
+    return yaml.load(data, Loader=_yaml_loader())
+
+
+def load_yaml_header(
+    path: str, keys: Collection[str], size: int = _HEADER_SIZE
+) -> Optional[Dict[str, str]]:
+    """
+    Parses the given top-level string values from the start of the YAML file at the given path, without reading or
+    constructing the rest of the document.
+
+    Keys which are absent from the document are omitted from the result. Returns None if the values could not be
+    determined from the first size bytes of the file.
+    """
+    import yaml
+
+    with open(path, "rb") as fp:
+        data = fp.read(size)
+    truncated = len(data) == size
+
+    header: Dict[str, str] = {}
+    pending: Optional[Tuple[str, str]] = None
+    key: Optional[str] = None
+    depth = 0
+    try:
+        for event in yaml.parse(data, Loader=_yaml_loader()):
+            if isinstance(event, yaml.CollectionStartEvent):
+                if depth == 0 and not isinstance(event, yaml.MappingStartEvent):
+                    return None
+                if depth == 1 and key in keys:
+                    return None
+                depth += 1
+            elif isinstance(event, yaml.CollectionEndEvent):
+                depth -= 1
+                if depth == 1:
+                    key = None
+                elif depth == 0:
+                    # The mapping may only appear to end because the file was cut short
+                    if truncated:
+                        return None
+                    if pending is not None:
+                        header[pending[0]] = pending[1]
+                    return header
+            elif depth == 1 and isinstance(event, yaml.NodeEvent):
+                if key is None:
+                    # Only trust a value once the next key has been reached, as the value may otherwise have been
+                    # cut short
+                    if pending is not None:
+                        header[pending[0]] = pending[1]
+                        pending = None
+                    if len(header) == len(keys):
+                        return header
+                    if not isinstance(event, yaml.ScalarEvent):
+                        return None
+                    key = event.value
+                else:
+                    if key in keys:
+                        if not isinstance(event, yaml.ScalarEvent) or not _is_str(event):
+                            return None
+                        pending = (key, event.value)
+                    key = None
+    except yaml.YAMLError:
+        return None
+    return None
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+# Prefer orjson where installed
+try:
+    import orjson
+
+    def dump_json(obj: Any) -> bytes:
+        """
+        Serialises the given object to indented UTF-8 encoded JSON. Sets are serialised as lists.
+        """
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2)
+
+    def load_json(data: bytes) -> Any:
+        """
+        Parses the given JSON document.
+        """
+        return orjson.loads(data)
+
+
+except ImportError:
+    import json
+
+    def dump_json(obj: Any) -> bytes:
+        """
+        Serialises the given object to indented UTF-8 encoded JSON. Sets are serialised as lists.
+        """
+        return json.dumps(obj, default=_json_default, indent=2).encode("utf-8")
+
+    def load_json(data: bytes) -> Any:
+        """
+        Parses the given JSON document.
+        """
+        return json.loads(data)
@@ -12,28 +12,27 @@ from packman.commands import (CleanCommand, Command, ExportCommand,
 from packman.config import read_config
 from packman.utils.output import SupportsWrite
 
-cfg = read_config()
-cfg.configure_logger()
-packman = Packman.from_config(cfg)
-DEFAULT_COMMANDS = {
-    "install": InstallCommand(packman),
-    "uninstall": UninstallCommand(packman),
-    "recover": RecoverCommand(packman),
-    "list": InstalledPackageListCommand(packman),
-    "update": UpdateCommand(packman),
-    "packages": PackageListCommand(packman),
-    "versions": VersionListCommand(packman),
-    "validate": ValidateCommand(packman),
-    "export": ExportCommand(packman),
-    "import": ImportCommand(packman),
-    "clean": CleanCommand(packman),
-}
+
+def _default_commands(packman: Packman) -> Dict[str, Command]:
+    return {
+        "install": InstallCommand(packman),
+        "uninstall": UninstallCommand(packman),
+        "recover": RecoverCommand(packman),
+        "list": InstalledPackageListCommand(packman),
+        "update": UpdateCommand(packman),
+        "packages": PackageListCommand(packman),
+        "versions": VersionListCommand(packman),
+        "validate": ValidateCommand(packman),
+        "export": ExportCommand(packman),
+        "import": ImportCommand(packman),
+        "clean": CleanCommand(packman),
+    }
 
 
 class PackmanCLI:
     def __init__(
         self,
-        commands: Dict[str, Command] = DEFAULT_COMMANDS,
+        commands: Dict[str, Command],
         no_interactive_mode: bool = False,
         file: Optional[SupportsWrite] = None,
     ) -> None:
@@ -88,8 +87,27 @@ class PackmanCLI:
             "Type \u0022exit\u0022 to quit or \u0022help\u0022 for more information."
         )
 
+        interactive = sys.stdin.isatty()
+        if interactive:
+            try:
+                # Gives input() line editing and history
+                import readline  # noqa: F401
+            except ImportError:
+                pass
+
         while True:
-            raw = input("> ")
+            raw: Optional[str]
+            if interactive:
+                try:
+                    raw = input("> ")
+                except EOFError:
+                    raw = None
+            else:
+                # Commands are being piped in, so skip the prompt and input()'s per-line terminal handling
+                raw = sys.stdin.readline() or None
+            if raw is None:
+                self.stop_interactive_mode()
+                break
             argv = shlex.split(raw)
             if argv:
                 arg0 = argv[0].lower()
@@ -136,7 +154,7 @@ class PackmanCLI:
             else:
                 raise Exception("no command provided")
         else:
-            command = DEFAULT_COMMANDS[command_name]
+            command = self.commands[command_name]
             command.execute_safe(**args_dict)
 
 
@@ -147,6 +165,10 @@ if __name__ == "__main__":
     sources.register_all(PackageSource)
     steps.register_all(InstallStep)
 
+    cfg = read_config()
+    cfg.configure_logger()
+    packman = Packman.from_config(cfg)
+
     # Set up parser
-    cli = PackmanCLI(commands=DEFAULT_COMMANDS)
+    cli = PackmanCLI(commands=_default_commands(packman))
     cli.parse(argv=sys.argv[1:])
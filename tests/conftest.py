@@ -9,18 +9,28 @@ from uuid import uuid4
 
 import pytest
 from loguru import logger
-from packman import Packman
+from packman import InstallStep, PackageSource, Packman, sources, steps
+from packman.utils.files import copy_file
 from pytest import Item
 
 # Set up logger with all logs because pytest itself suppresses output
 logger.remove()
 logger.add(stderr, level="TRACE")
 
+_DEFINITION_TEMPLATE = """name: {name}
+sources:
+  - github: dkavolis/Ferram-Aerospace-Research
+steps:
+  - copy-folder: GameData
+    to: GameData
+"""
+
 
 def _copytree(src: str, dest: str) -> None:
     logger.debug(f"copying {src=} to {dest=}")
     try:
-        shutil.copytree(src, dest)
+        # Not hard links; tests may rewrite fixture files such as operation state files in place
+        shutil.copytree(src, dest, copy_function=copy_file)
     except FileNotFoundError:
         pass
 
@@ -78,9 +88,24 @@ def packman(mock_path: str) -> Generator[Packman, None, None]:
         root_dir=os.path.join(mock_path, "mockgame"),
         config_dir=os.path.join(mock_path, "mockconfigs"),
         manifest_path=os.path.join(mock_path, "mockgame", "manifest.json"),
+        git_config_dir=os.path.join(mock_path, "mockgitconfigs"),
+        git_url="",
     )
 
 
+@pytest.fixture(scope="session")
+def register_unions() -> None:
+    """ Registers all package sources and install steps so that package definitions can be parsed. """
+    sources.register_all(PackageSource)
+    steps.register_all(InstallStep)
+
+
+@pytest.fixture(scope="session")
+def definition_template() -> str:
+    """ Returns the YAML for a valid package definition, with a {name} placeholder for the package name. """
+    return _DEFINITION_TEMPLATE
+
+
 def pytest_make_parametrize_id(config, val, argname):
     val_str = repr(val).replace("-", "--")
     return f"{argname}: {val_str}"
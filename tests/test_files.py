@@ -0,0 +1,143 @@
+import errno
+import hashlib
+import os
+import shutil
+from typing import Callable, Iterator, List
+
+import pytest
+from packman.utils import files
+from packman.utils.files import (
+    checksum,
+    checksum_algorithm,
+    copy_file,
+    files_equal,
+    matches_checksum,
+)
+
+
+@pytest.mark.parametrize("data", [b"", b"Foo\nBar\n"])
+def test_matches_checksum_should_verify_each_algorithm(file_paths: Iterator[str], data: bytes) -> None:
+    path = next(file_paths)
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+    sha256 = f"sha256:{hashlib.sha256(data).hexdigest()}"
+    assert checksum(path, algorithm="sha256") == sha256
+    assert matches_checksum(path, [sha256]), "checksum recorded with another algorithm should still match"
+    assert matches_checksum(path, ["sha256:0", checksum(path)])
+    assert not matches_checksum(path, ["sha256:0"])
+    assert not matches_checksum(path, [])
+
+
+def test_checksum_algorithm() -> None:
+    assert checksum_algorithm("sha256:abc") == "sha256"
+    with pytest.raises(ValueError):
+        checksum_algorithm("abc")
+
+
+def _partial_copy_range(limit: int, then: Callable[[], int]) -> Callable[[int, int, int, int], int]:
+    """
+    Returns a copy_range function which copies up to limit bytes in total, then returns or raises via then.
+    """
+    copied = 0
+
+    def copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+        nonlocal copied
+        count = min(count, limit - copied)
+        if count <= 0:
+            return then()
+        data = os.pread(src_fd, count, offset)
+        os.pwrite(dst_fd, data, offset)
+        copied += len(data)
+        return len(data)
+
+    return copy_range
+
+
+def _raise_oserror() -> int:
+    raise OSError(errno.EXDEV, "not supported")
+
+
+@pytest.mark.skipif(not hasattr(os, "pwrite"), reason="requires os.pread and os.pwrite")
+@pytest.mark.parametrize(
+    "copy_range_funcs",
+    [
+        # copy_file_range stops partway, then sendfile finishes
+        lambda: [_partial_copy_range(300, _raise_oserror), _partial_copy_range(10000, _raise_oserror)],
+        # copy_file_range then sendfile stop partway, then copyfileobj finishes
+        lambda: [_partial_copy_range(300, _raise_oserror), _partial_copy_range(200, _raise_oserror)],
+        # copy_file_range reports no more data before the end, then copyfileobj finishes
+        lambda: [_partial_copy_range(300, lambda: 0), _partial_copy_range(10000, _raise_oserror)],
+        # neither is available
+        lambda: [],
+    ],
+    ids=["sendfile", "copyfileobj", "short copy", "no copy range"],
+)
+def test_copy_file_should_resume_each_fallback(
+    file_paths: Iterator[str],
+    monkeypatch: pytest.MonkeyPatch,
+    copy_range_funcs: Callable[[], List[Callable[[int, int, int, int], int]]],
+) -> None:
+    monkeypatch.setattr(files, "_reflink", lambda src_fd, dst_fd: False)
+    monkeypatch.setattr(files, "_COPY_RANGE_FUNCS", copy_range_funcs())
+    src = next(file_paths)
+    dst = next(file_paths)
+    data = os.urandom(1000)
+    with open(src, "wb") as fp:
+        fp.write(data)
+    with open(dst, "wb") as fp:
+        fp.write(b"previous contents longer than the source" * 100)
+
+    copy_file(src, dst)
+
+    with open(dst, "rb") as fp:
+        assert fp.read() == data
+
+
+def test_copy_file_should_not_copy_onto_itself(file_paths: Iterator[str]) -> None:
+    path = next(file_paths)
+    with open(path, "wb") as fp:
+        fp.write(b"Foo")
+
+    with pytest.raises(shutil.SameFileError):
+        copy_file(path, path)
+
+    with open(path, "rb") as fp:
+        assert fp.read() == b"Foo", "source should be left intact"
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "expected"),
+    [
+        (b"", b"", True),
+        (b"Foo\nBar\n", b"Foo\nBar\n", True),
+        (b"Foo\nBar\n", b"Foo\nBaz\n", False),
+        (b"Foo\nBar\n", b"Foo\nBar", False),
+    ],
+    ids=["empty", "equal", "different", "different size"],
+)
+def test_files_equal(file_paths: Iterator[str], a: bytes, b: bytes, expected: bool) -> None:
+    path_a = next(file_paths)
+    path_b = next(file_paths)
+    with open(path_a, "wb") as fp:
+        fp.write(a)
+    with open(path_b, "wb") as fp:
+        fp.write(b)
+
+    assert files_equal(path_a, path_b) is expected
+
+
+def test_matches_checksum_should_not_match_unavailable_algorithm(
+    file_paths: Iterator[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = next(file_paths)
+    with open(path, "wb") as fp:
+        fp.write(b"Foo\nBar\n")
+    xxh3_128 = checksum(path, algorithm="xxh3_128") if files.xxhash else "xxh3_128:0"
+    sha256 = checksum(path, algorithm="sha256")
+
+    monkeypatch.setattr(files, "xxhash", None)
+
+    assert not files.checksum_algorithm_available("xxh3_128")
+    assert not matches_checksum(path, [xxh3_128]), "unverifiable checksum should be treated as a mismatch"
+    assert matches_checksum(path, [xxh3_128, sha256])
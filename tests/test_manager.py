@@ -0,0 +1,296 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Optional
+
+import pytest
+from packman import Packman, manager
+from packman.manager import VersionNotFoundError
+from packman.models.manifest import Manifest, ManifestPackage
+from packman.models.package_source import PackageVersion
+from packman.utils import files
+from packman.utils.operation import Operation
+
+pytestmark = pytest.mark.usefixtures("register_unions")
+
+
+class _Source:
+    """ Stands in for a package source, recording each query made to it. """
+
+    def __init__(self, name: str, queries: List[str], versions: Optional[List[str]] = None) -> None:
+        """
+        :param versions: The versions this source provides, latest first; if None, every query fails.
+        """
+        self.name = name
+        self.queries = queries
+        self.versions = versions
+
+    def __str__(self) -> str:
+        return self.name
+
+    def _query(self) -> List[str]:
+        self.queries.append(self.name)
+        if self.versions is None:
+            raise RuntimeError(f"{self.name} failed")
+        return self.versions
+
+    def get_versions(self) -> Iterator[str]:
+        return iter(self._query())
+
+    def get_version(self, version: Optional[str]) -> PackageVersion:
+        self._query()
+        return PackageVersion(name=self.name, version=version, options=["default"])
+
+    def get_latest_version(self) -> PackageVersion:
+        versions = self._query()
+        return PackageVersion(name=self.name, version=versions[0] if versions else None, options=["default"])
+
+    def fetch_version(self, version: Optional[str], option: str, operation: Operation, on_progress: Any) -> None:
+        operation.get_temp_path()
+
+
+class _WriteFile:
+    """ Stands in for an install step, writing a single file to the root directory. """
+
+    def __init__(self, name: str, content: str = "Foo") -> None:
+        self.name = name
+        self.content = content
+
+    def execute(self, operation: Operation, package_path: str, root_dir: str, on_progress: Any) -> None:
+        operation.write_file(os.path.join(root_dir, self.name), self.content)
+
+
+@pytest.fixture(scope="function")
+def queries() -> List[str]:
+    """ Returns a list in which each _Source records its name whenever it is queried. """
+    return []
+
+
+def _use_sources(
+    packman: Packman,
+    monkeypatch: pytest.MonkeyPatch,
+    sources: List[_Source],
+    steps: Optional[List[_WriteFile]] = None,
+) -> None:
+    monkeypatch.setattr(
+        packman,
+        "package_definition",
+        lambda name: SimpleNamespace(name=name, sources=sources, steps=steps or []),
+    )
+
+
+def test_get_version_info_should_return_first_successful_source(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str]
+) -> None:
+    _use_sources(
+        packman,
+        monkeypatch,
+        [_Source("a", queries), _Source("b", queries, ["1.0"]), _Source("c", queries, ["1.0"])],
+    )
+
+    assert packman.get_version_info("foo", "1.0").name == "b"
+    assert queries == ["a", "b"], "later sources should only be queried when earlier ones fail"
+
+
+def test_get_version_info_should_raise_when_every_source_fails(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str]
+) -> None:
+    _use_sources(packman, monkeypatch, [_Source("a", queries), _Source("b", queries)])
+
+    with pytest.raises(VersionNotFoundError):
+        packman.get_version_info("foo", "1.0")
+    assert queries == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    ("versions", "expected", "expected_queries"),
+    [
+        ([["1.0"], ["2.0"]], "a", ["a"]),
+        ([None, ["2.0"]], "b", ["a", "b"]),
+        ([[], None, ["2.0"]], "c", ["a", "b", "c"]),
+        ([[], ["2.0"]], "b", ["a", "b"]),
+        ([[], None], "a", ["a", "b"]),
+    ],
+    ids=["first", "skip failed", "prefer versioned", "prefer later versioned", "fall back on unversioned"],
+)
+def test_get_latest_version_info_should_query_sources_in_order(
+    packman: Packman,
+    monkeypatch: pytest.MonkeyPatch,
+    queries: List[str],
+    versions: List[Optional[List[str]]],
+    expected: str,
+    expected_queries: List[str],
+) -> None:
+    _use_sources(packman, monkeypatch, [_Source(name, queries, v) for name, v in zip("abc", versions)])
+
+    assert packman.get_latest_version_info("foo").name == expected
+    assert queries == expected_queries
+
+
+def test_package_definition_should_find_definitions_added_after_scanning(
+    packman: Packman, definition_template: str
+) -> None:
+    assert "foo" not in packman.definition_paths()
+
+    with open(os.path.join(packman.definition_dir, "foo.yml"), "w") as fp:
+        fp.write(definition_template.format(name="Foo"))
+
+    assert packman.package_definition("foo").name == "Foo"
+    with pytest.raises(FileNotFoundError):
+        packman.package_definition("bar")
+
+
+def test_validate_should_report_files_with_unverifiable_checksums(
+    packman: Packman, file_paths: Iterator[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    unverifiable = next(file_paths)
+    malformed = next(file_paths)
+    valid = next(file_paths)
+    for path in (unverifiable, malformed, valid):
+        with open(path, "wb") as fp:
+            fp.write(b"Foo\nBar\n")
+    packman.manifest.packages["Foo"] = ManifestPackage(
+        version="1.0",
+        options=set(),
+        files={unverifiable, malformed, valid},
+        checksums={
+            unverifiable: "xxh3_128:0",
+            malformed: "0",
+            valid: files.checksum(valid, algorithm="sha256"),
+        },
+    )
+
+    monkeypatch.setattr(files, "xxhash", None)
+
+    assert list(packman.validate("Foo")) == [unverifiable, malformed]
+    assert os.path.exists(unverifiable), "validate should not modify files"
+
+
+def test_validate_should_report_invalid_files_in_manifest_order(packman: Packman, file_paths: Iterator[str]) -> None:
+    paths = [next(file_paths) for _ in range(8)]
+    for path in paths:
+        with open(path, "wb") as fp:
+            fp.write(b"Foo\nBar\n")
+    packman.manifest.packages["Foo"] = ManifestPackage(
+        version="1.0",
+        options=set(),
+        files=set(paths),
+        checksums={
+            path: files.checksum(path) if i % 2 else "sha256:0" for i, path in enumerate(paths)
+        },
+    )
+
+    assert list(packman.validate("Foo")) == paths[::2]
+
+
+def test_package_headers_should_skip_invalid_definitions(packman: Packman, definition_template: str) -> None:
+    with open(os.path.join(packman.definition_dir, "foo.yml"), "w") as fp:
+        fp.write(definition_template.format(name="Foo"))
+    with open(os.path.join(packman.definition_dir, "bar.yml"), "w") as fp:
+        fp.write(f"description: {'Bar' * 34}\n")
+        fp.write(definition_template.format(name="Bar"))
+
+    assert dict(packman.package_headers(names=["foo", "bar"])) == {"foo": ("Foo", "")}
+
+
+@pytest.mark.parametrize("all_sources", [True, False], ids=["all sources", "first source"])
+def test_available_versions_should_skip_failed_sources(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str], all_sources: bool
+) -> None:
+    _use_sources(
+        packman,
+        monkeypatch,
+        [_Source("a", queries), _Source("b", queries, ["2.0", "1.0"]), _Source("c", queries, ["3.0", "2.0"])],
+    )
+
+    versions = list(packman.available_versions("foo", all_sources=all_sources))
+
+    if all_sources:
+        assert versions == ["2.0", "1.0", "3.0"], "versions should be yielded in source order without duplicates"
+        assert sorted(queries) == ["a", "b", "c"]
+    else:
+        assert versions == ["2.0", "1.0"]
+        assert queries == ["a", "b"], "sources after the first to provide versions should not be queried"
+
+
+@pytest.mark.parametrize("all_sources", [True, False], ids=["all sources", "first source"])
+def test_available_versions_should_raise_only_when_every_source_fails(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str], all_sources: bool
+) -> None:
+    _use_sources(packman, monkeypatch, [_Source("a", queries), _Source("b", queries)])
+
+    with pytest.raises(VersionNotFoundError):
+        list(packman.available_versions("foo", all_sources=all_sources))
+
+    _use_sources(packman, monkeypatch, [_Source("a", queries), _Source("b", queries, [])])
+
+    assert list(packman.available_versions("foo", all_sources=all_sources)) == [], (
+        "a source without versions is not a failure"
+    )
+
+
+@pytest.mark.parametrize("all_sources", [True, False], ids=["all sources", "first source"])
+def test_available_versions_should_only_use_thread_pool_for_all_sources(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str], all_sources: bool
+) -> None:
+    pools: List[ThreadPoolExecutor] = []
+
+    def executor(*args: Any, **kwargs: Any) -> ThreadPoolExecutor:
+        pools.append(ThreadPoolExecutor(*args, **kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(manager, "ThreadPoolExecutor", executor)
+    _use_sources(packman, monkeypatch, [_Source("a", queries, ["1.0"]), _Source("b", queries, ["2.0"])])
+
+    list(packman.available_versions("foo", all_sources=all_sources))
+
+    assert len(pools) == (1 if all_sources else 0)
+
+
+def test_install_package_should_write_manifest_for_each_package(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str]
+) -> None:
+    for name in ("foo", "bar"):
+        _use_sources(packman, monkeypatch, [_Source("a", queries, ["1.0"])], steps=[_WriteFile(f"{name}.txt")])
+
+        assert packman.install_package(name, version=None)
+
+        assert name in Manifest.from_json(packman.manifest_path).packages, "manifest should be written on install"
+
+
+def test_failed_install_should_discard_manifest_changes(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str]
+) -> None:
+    _use_sources(packman, monkeypatch, [_Source("a", queries, ["1.0"])], steps=[_WriteFile("foo.txt")])
+    packman.install_package("foo", version=None)
+    _use_sources(packman, monkeypatch, [_Source("a", queries, ["1.0"])], steps=[_WriteFile("bar.txt")])
+
+    def write_json(self: Manifest, path: str) -> None:
+        raise RuntimeError("write failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(Manifest, "write_json", write_json)
+        with pytest.raises(RuntimeError):
+            packman.install_package("bar", version=None)
+
+    assert set(packman.manifest.packages) == {"foo"}, "manifest should not record the failed install"
+    assert set(Manifest.from_json(packman.manifest_path).packages) == {"foo"}
+    assert os.path.exists(os.path.join(packman.root_dir, "foo.txt"))
+    assert not os.path.exists(os.path.join(packman.root_dir, "bar.txt")), "failed install should be rolled back"
+
+
+def test_failed_uninstall_should_discard_manifest_changes(
+    packman: Packman, monkeypatch: pytest.MonkeyPatch, queries: List[str]
+) -> None:
+    _use_sources(packman, monkeypatch, [_Source("a", queries, ["1.0"])], steps=[_WriteFile("foo.txt")])
+    packman.install_package("foo", version=None)
+
+    def write_json(self: Manifest, path: str) -> None:
+        raise RuntimeError("write failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(Manifest, "write_json", write_json)
+        with pytest.raises(RuntimeError):
+            packman.uninstall_package("foo")
+
+    assert set(packman.manifest.packages) == {"foo"}, "manifest should match the manifest file"
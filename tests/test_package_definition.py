@@ -0,0 +1,34 @@
+from typing import Iterator
+
+import pytest
+from packman.models.package_definition import PackageDefinition
+from pydantic import ValidationError
+
+pytestmark = pytest.mark.usefixtures("register_unions")
+
+
+def test_from_yaml_should_reload_modified_definitions(file_paths: Iterator[str], definition_template: str) -> None:
+    path = next(file_paths)
+    with open(path, "w") as fp:
+        fp.write(definition_template.format(name="Foo"))
+
+    assert PackageDefinition.from_yaml(path).name == "Foo"
+    assert PackageDefinition.from_yaml(path) is PackageDefinition.from_yaml(path), "definition should be cached"
+
+    with open(path, "w") as fp:
+        fp.write(definition_template.format(name="Foo Bar"))
+
+    assert PackageDefinition.from_yaml(path).name == "Foo Bar", "modified definition should be reloaded"
+    assert PackageDefinition.header_from_yaml(path) == ("Foo Bar", "")
+
+
+def test_header_from_yaml_should_validate_header(file_paths: Iterator[str], definition_template: str) -> None:
+    path = next(file_paths)
+    with open(path, "w") as fp:
+        fp.write(f"description: {'Foo' * 34}\n")
+        fp.write(definition_template.format(name="Foo"))
+
+    with pytest.raises(ValidationError):
+        PackageDefinition.header_from_yaml(path)
+    with pytest.raises(ValidationError):
+        PackageDefinition.from_yaml(path)
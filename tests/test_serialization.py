@@ -0,0 +1,54 @@
+from typing import Dict, Iterator, Optional
+
+import pytest
+from packman.utils.serialization import load_yaml_header
+
+_KEYS = ("name", "description")
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (b"name: Foo\ndescription: Bar\nsteps: []\n", {"name": "Foo", "description": "Bar"}),
+        (b"name: Foo\nsteps:\n  - a: 1\ndescription: 'Bar'\n", {"name": "Foo", "description": "Bar"}),
+        (b"sources: [1]\nname: Foo\n", {"name": "Foo"}),
+        (b"name: Foo\ndescription: >\n  Bar\n  Baz\n", {"name": "Foo", "description": "Bar Baz\n"}),
+        (b"name: 123\n", None),
+        (b"name: [Foo]\n", None),
+        (b"- Foo\n", None),
+        (b"name: 'Foo\n", None),
+    ],
+    ids=["header", "nested", "absent", "folded", "not a string", "not a scalar", "not a mapping", "invalid"],
+)
+def test_load_yaml_header(
+    file_paths: Iterator[str], data: bytes, expected: Optional[Dict[str, str]]
+) -> None:
+    path = next(file_paths)
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+    assert load_yaml_header(path, keys=_KEYS) == expected
+
+
+@pytest.mark.parametrize("data", [b"name: Foo\ndescription: Bar Baz\nsteps: []\n"])
+@pytest.mark.parametrize("size", [8, 20, 28, 30])
+def test_load_yaml_header_should_not_trust_values_cut_short(
+    file_paths: Iterator[str], data: bytes, size: int
+) -> None:
+    path = next(file_paths)
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+    assert load_yaml_header(path, keys=_KEYS, size=size) is None, "header should be incomplete"
+
+
+@pytest.mark.parametrize("data", [b"name: Foo\ndescription: Bar Baz\nsteps: []\n"])
+def test_load_yaml_header_should_stop_at_next_key(file_paths: Iterator[str], data: bytes) -> None:
+    path = next(file_paths)
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+    assert load_yaml_header(path, keys=_KEYS, size=37) == {
+        "name": "Foo",
+        "description": "Bar Baz",
+    }, "header should be complete once the following key is read"